@@ -1,40 +1,142 @@
 import asyncio
-import subprocess
-from urllib.parse import quote
+import functools
+import os
+from collections.abc import Awaitable, Callable
+from urllib.parse import quote, unquote, urlencode
 
-from mcp.server.models import InitializationOptions
 import mcp.types as types
 from mcp.server import NotificationOptions, Server
 from pydantic import AnyUrl
-import mcp.server.stdio
 
 # Store notes as a simple key-value dict to demonstrate state management
 notes: dict[str, str] = {}
 
+_NOTE_URI_PREFIX = "note://internal/"
+
+# Resource entries for `notes`, kept in sync on every mutation so listing
+# doesn't re-parse a URI per note on each request
+_resources: dict[str, types.Resource] = {}
+
+# Pre-formatted "- name: content" lines for the summarize-notes prompt,
+# likewise updated whenever a note is added or overwritten
+_notes_prompt_lines: dict[str, str] = {}
+
 server = Server("mcp-server-agenda")
 
+def _positive_int_env(name: str, default: int) -> int:
+    """Read a positive integer setting from the environment."""
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {raw!r}") from None
+    if value < 1:
+        raise ValueError(f"{name} must be at least 1, got {value}")
+    return value
+
+# Upper bound on concurrent 'open' processes, so batched tool calls don't
+# flood LaunchServices. Override with the AGENDA_MAX_CONCURRENCY env var.
+_OPEN_SEM = asyncio.Semaphore(_positive_int_env("AGENDA_MAX_CONCURRENCY", 8))
+
+# Pending dispatches of idempotent URLs, keyed by URL, so concurrent
+# duplicates share one 'open' process instead of spawning their own
+_in_flight: dict[str, asyncio.Future] = {}
+
+@functools.cache
+def _launch_services():
+    """
+    Load the optional pyobjc bindings used to dispatch URLs through
+    LaunchServices directly rather than spawning /usr/bin/open.
+    Imported on first use since they are slow to load; None if missing.
+    """
+    try:
+        import CoreFoundation
+        import LaunchServices
+    except ImportError:
+        return None
+    return CoreFoundation, LaunchServices
+
 class XCallbackURLHandler:
     """Handles x-callback-url execution on macOS systems."""
     
     @staticmethod
-    def call_url(url: str) -> str:
+    async def call_url(url: str, coalesce: bool = False) -> None:
         """
         Executes an x-callback-url on macOS using the 'open' command.
+        The subprocess is awaited so the event loop keeps serving other requests.
+        With `coalesce`, a call for a URL that is already being dispatched
+        waits on that dispatch instead; only use it for idempotent actions.
         """
-        try:
-            # Execute the URL using the macOS 'open' command without additional encoding
-            # The URL parameters should already be properly encoded
-            result = subprocess.run(
-                ['open', url],
-                check=True,
-                capture_output=True,
-                text=True
+        if not coalesce:
+            await XCallbackURLHandler._open(url)
+            return
+
+        fut = _in_flight.get(url)
+        if fut is None:
+            fut = asyncio.ensure_future(XCallbackURLHandler._open(url))
+            _in_flight[url] = fut
+            fut.add_done_callback(lambda _: _in_flight.pop(url, None))
+        # Shield so one cancelled caller doesn't cancel the shared dispatch
+        await asyncio.shield(fut)
+
+    @staticmethod
+    async def _open(url: str) -> None:
+        """Dispatch a single URL, raising RuntimeError on failure."""
+        # The first call imports pyobjc, which is slow, so keep it off the loop
+        if await asyncio.to_thread(_launch_services) is not None:
+            async with _OPEN_SEM:
+                await asyncio.to_thread(XCallbackURLHandler._ls_open, url)
+            return
+
+        # Execute the URL using the macOS 'open' command without additional encoding
+        # The URL parameters should already be properly encoded.
+        # -g keeps Agenda in the background instead of stealing focus, and
+        # stdout is discarded since 'open' prints nothing useful there.
+        # close_fds=False skips the fd sweep before exec: Python opens fds
+        # non-inheritable, so the child still only gets stdio.
+        async with _OPEN_SEM:
+            proc = await asyncio.create_subprocess_exec(
+                'open', '-g', url,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+                close_fds=False,
+            )
+            _, stderr = await proc.communicate()
+
+        if proc.returncode != 0:
+            raise RuntimeError(
+                f"Failed to execute x-callback-url: 'open' exited with status "
+                f"{proc.returncode}: {stderr.decode(errors='replace').strip()}"
+            )
+
+    @staticmethod
+    def _ls_open(url: str) -> None:
+        """Hand a URL to LaunchServices without going through 'open'."""
+        CoreFoundation, LaunchServices = _launch_services()
+
+        url_ref = CoreFoundation.CFURLCreateWithString(None, url, None)
+        if url_ref is None:
+            raise RuntimeError(f"Failed to execute x-callback-url: invalid URL {url}")
+
+        # kLSLaunchDontSwitch is the equivalent of 'open -g': Agenda handles
+        # the URL without being brought to the foreground
+        spec = LaunchServices.LSLaunchURLSpec(
+            appURL=None,
+            itemURLs=CoreFoundation.CFArrayCreate(
+                None, [url_ref], 1, CoreFoundation.kCFTypeArrayCallBacks
+            ),
+            passThruParams=None,
+            launchFlags=LaunchServices.kLSLaunchDefaults
+            | LaunchServices.kLSLaunchDontSwitch,
+            asyncRefCon=None,
+        )
+        err, _ = LaunchServices.LSOpenFromURLSpec(spec, None)
+        if err != 0:
+            raise RuntimeError(
+                f"Failed to execute x-callback-url: LSOpenFromURLSpec returned {err}"
             )
-            
-            return result.stdout
-            
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"Failed to execute x-callback-url: {e}")
 
 @server.list_resources()
 async def handle_list_resources() -> list[types.Resource]:
@@ -42,30 +144,47 @@ async def handle_list_resources() -> list[types.Resource]:
     List available note resources.
     Each note is exposed as a resource with a custom note:// URI scheme.
     """
-    return [
-        types.Resource(
-            uri=AnyUrl(f"note://internal/{name}"),
-            name=f"Note: {name}",
-            description=f"A simple note named {name}",
-            mimeType="text/plain",
-        )
-        for name in notes
-    ]
+    return list(_resources.values())
 
 @server.read_resource()
 async def handle_read_resource(uri: AnyUrl) -> str:
     """
     Read a specific note's content by its URI.
-    The note name is extracted from the URI host component.
+    The note name is taken from the URI path (note://internal/<name>),
+    falling back to the host component for note://<name>.
     """
     if uri.scheme != "note":
         raise ValueError(f"Unsupported URI scheme: {uri.scheme}")
 
-    name = uri.path
-    if name is not None:
-        name = name.lstrip("/")
+    name = uri.path or ""
+    if name.startswith("/"):
+        name = name[1:]
+    # AnyUrl percent-encodes the path, e.g. "My Note" is listed as My%20Note
+    name = unquote(name)
+    if not name and uri.host != "internal":
+        name = uri.host or ""
+    if not name:
+        raise ValueError("Note not found: missing note name")
+
+    try:
         return notes[name]
-    raise ValueError(f"Note not found: {name}")
+    except KeyError:
+        raise ValueError(f"Note not found: {name}")
+
+# Prompt definitions are static, so build them once at import time
+_PROMPTS_LIST = [
+    types.Prompt(
+        name="summarize-notes",
+        description="Creates a summary of all notes",
+        arguments=[
+            types.PromptArgument(
+                name="style",
+                description="Style of the summary (brief/detailed)",
+                required=False,
+            )
+        ],
+    )
+]
 
 @server.list_prompts()
 async def handle_list_prompts() -> list[types.Prompt]:
@@ -73,19 +192,7 @@ async def handle_list_prompts() -> list[types.Prompt]:
     List available prompts.
     Each prompt can have optional arguments to customize its behavior.
     """
-    return [
-        types.Prompt(
-            name="summarize-notes",
-            description="Creates a summary of all notes",
-            arguments=[
-                types.PromptArgument(
-                    name="style",
-                    description="Style of the summary (brief/detailed)",
-                    required=False,
-                )
-            ],
-        )
-    ]
+    return list(_PROMPTS_LIST)
 
 @server.get_prompt()
 async def handle_get_prompt(
@@ -109,92 +216,362 @@ async def handle_get_prompt(
                 content=types.TextContent(
                     type="text",
                     text=f"Here are the current notes to summarize:{detail_prompt}\n\n"
-                    + "\n".join(
-                        f"- {name}: {content}"
-                        for name, content in notes.items()
-                    ),
+                    + "\n".join(_notes_prompt_lines.values()),
                 ),
             )
         ],
     )
 
+# Tool definitions are static, so build them once at import time
+_TOOLS_LIST = [
+    types.Tool(
+        name="add-note",
+        description="Add a new note",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "name": {"type": "string"},
+                "content": {"type": "string"},
+            },
+            "required": ["name", "content"],
+        },
+    ),
+    types.Tool(
+        name="create-agenda-note",
+        description="Create a note in Agenda",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "title": {"type": "string"},
+                "text": {"type": "string"},
+                "project_title": {"type": "string"},
+                "on_the_agenda": {"type": "boolean"},
+                "date": {"type": "string"},
+                "start_date": {"type": "string"},
+                "end_date": {"type": "string"},
+                "template_name": {"type": "string"},
+                "template_input": {"type": "string"},
+                "collapsed": {"type": "boolean"},
+                "completed": {"type": "boolean"},
+                "pinned": {"type": "boolean"},
+                "footnote": {"type": "boolean"},
+                "select": {"type": "boolean"},
+            },
+            "required": ["title", "text"],
+        },
+    ),
+    types.Tool(
+        name="create-agenda-project",
+        description="Create a new project in Agenda",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "title": {"type": "string"},
+                "category_title": {"type": "string"},
+                "identifier": {"type": "string"},
+                "select": {"type": "boolean"},
+                "sort_order": {
+                    "type": "string",
+                    "enum": ["newest-first", "oldest-first"]
+                }
+            },
+            "required": ["title"]
+        },
+    ),
+    types.Tool(
+        name="open-agenda-note",
+        description="Open a note in Agenda",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "title": {"type": "string"},
+                "identifier": {"type": "string"},
+                "project_title": {"type": "string"},
+                "separate_window": {"type": "boolean"}
+            },
+            # No required fields since either title or identifier can be used
+        },
+    ),
+    types.Tool(
+        name="batch-agenda-ops",
+        description="Run several Agenda tool calls concurrently",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "calls": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "name": {"type": "string"},
+                            "arguments": {"type": "object"}
+                        },
+                        "required": ["name"]
+                    }
+                }
+            },
+            "required": ["calls"]
+        },
+    )
+]
+
 @server.list_tools()
 async def handle_list_tools() -> list[types.Tool]:
     """
     List available tools.
     Each tool specifies its arguments using JSON Schema validation.
     """
+    return list(_TOOLS_LIST)
+
+# Agenda's spelling of boolean parameters, for the values a client may send
+_BOOL_STR = {
+    True: "true",
+    False: "false",
+    "true": "true",
+    "false": "false",
+}
+
+def _encode_bool(value) -> str:
+    """Render a boolean argument the way Agenda's x-callback-urls expect."""
+    try:
+        return _BOOL_STR[value]
+    except (KeyError, TypeError):
+        raise ValueError("expected bool") from None
+
+def _encode_str(value) -> str:
+    """Pass a string argument through; urlencode does the escaping."""
+    if not isinstance(value, str):
+        raise ValueError("expected string")
+    return value
+
+# (argument name, x-callback-url parameter, encoder) per Agenda action.
+# Tuples, built once at import, since _build_url walks them on every call.
+_Field = tuple[str, str, Callable[[object], str]]
+
+_CREATE_NOTE_FIELDS: tuple[_Field, ...] = (
+    ("title", "title", _encode_str),
+    ("text", "text", _encode_str),
+    ("project_title", "project-title", _encode_str),
+    ("on_the_agenda", "on-the-agenda", _encode_bool),
+    ("date", "date", _encode_str),
+    ("start_date", "start-date", _encode_str),
+    ("end_date", "end-date", _encode_str),
+    ("template_name", "template-name", _encode_str),
+    ("template_input", "template-input", _encode_str),
+    ("collapsed", "collapsed", _encode_bool),
+    ("completed", "completed", _encode_bool),
+    ("pinned", "pinned", _encode_bool),
+    ("footnote", "footnote", _encode_bool),
+    ("select", "select", _encode_bool),
+)
+
+_CREATE_PROJECT_FIELDS: tuple[_Field, ...] = (
+    ("title", "title", _encode_str),
+    ("category_title", "category-title", _encode_str),
+    ("identifier", "identifier", _encode_str),
+    ("select", "select", _encode_bool),
+    ("sort_order", "sort-order", _encode_str),
+)
+
+_OPEN_NOTE_FIELDS: tuple[_Field, ...] = (
+    ("title", "title", _encode_str),
+    ("identifier", "identifier", _encode_str),
+    ("project_title", "project-title", _encode_str),
+    ("separate_window", "separate-window", _encode_bool),
+)
+
+# URLs are passed to 'open' on argv, so very large ones fail with ARG_MAX.
+# Reject them up front; override with the AGENDA_MAX_URL_LEN env var.
+_MAX_URL_LEN = _positive_int_env("AGENDA_MAX_URL_LEN", 131072)
+
+_ACTION_FIELDS: dict[str, tuple[_Field, ...]] = {
+    "create-note": _CREATE_NOTE_FIELDS,
+    "create-project": _CREATE_PROJECT_FIELDS,
+    "open-note": _OPEN_NOTE_FIELDS,
+}
+
+# Actions whose URLs are worth memoizing: small and commonly repeated.
+# create-note is left out since its text payloads are large and rarely
+# repeat, so caching them would only pin memory.
+_CACHED_ACTIONS = frozenset({"create-project", "open-note"})
+
+def _build_url(action: str, arguments: dict) -> str:
+    """
+    Build an x-callback URL for an Agenda action from the tool arguments.
+    Values are percent-encoded by urlencode, so encoders only validate
+    and render them as strings.
+    """
+    pairs = []
+    for key, url_key, encode in _ACTION_FIELDS[action]:
+        if key in arguments:
+            try:
+                pairs.append((url_key, encode(arguments[key])))
+            except ValueError as e:
+                raise ValueError(f"{e} for {key}") from None
+    url = f"agenda://x-callback-url/{action}?{urlencode(pairs, quote_via=quote)}"
+    if len(url) > _MAX_URL_LEN:
+        raise ValueError(
+            f"x-callback URL too large ({len(url)} > {_MAX_URL_LEN} characters); "
+            "split the text into smaller chunks"
+        )
+    return url
+
+@functools.lru_cache(maxsize=256)
+def _build_url_cached(action: str, items: tuple) -> str:
+    """
+    Memoized _build_url keyed on (key, type, value) items.
+    The value's type is part of the key so that e.g. 1 and True, which
+    compare equal, don't share an entry.
+    """
+    return _build_url(action, {key: value for key, _, value in items})
+
+def _url_for(action: str, arguments: dict) -> str:
+    """Build (or fetch from cache) the x-callback URL for a tool call."""
+    if action not in _CACHED_ACTIONS:
+        return _build_url(action, arguments)
+
+    # Key only on the fields the action uses, in table order, so unrelated
+    # arguments neither split the cache nor need to be hashable
+    items = tuple(
+        (key, type(arguments[key]), arguments[key])
+        for key, _, _ in _ACTION_FIELDS[action]
+        if key in arguments
+    )
+    try:
+        return _build_url_cached(action, items)
+    except TypeError:
+        # Unhashable values can't be valid strings or bools; let the
+        # encoders report which field is wrong
+        return _build_url(action, arguments)
+
+async def _dispatch_url(
+    url: str, success_text: str, failure_text: str, coalesce: bool = False
+) -> list[types.TextContent]:
+    """
+    Execute an x-callback URL and report the outcome as tool output.
+    Failures are returned to the client rather than raised.
+    """
+    try:
+        await XCallbackURLHandler.call_url(url, coalesce=coalesce)
+        return [types.TextContent(type="text", text=success_text)]
+    except Exception as e:
+        return [types.TextContent(type="text", text=f"{failure_text}: {str(e)}")]
+
+async def _do_add_note(
+    arguments: dict,
+) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+    """Store a note in server state and notify clients."""
+    note_name = arguments.get("name")
+    content = arguments.get("content")
+
+    if not note_name or not content:
+        raise ValueError("Missing name or content")
+
+    # Update server state
+    notes[note_name] = content
+    # The resource only depends on the name, so overwrites reuse it
+    if note_name not in _resources:
+        _resources[note_name] = types.Resource(
+            uri=AnyUrl(f"{_NOTE_URI_PREFIX}{note_name}"),
+            name=f"Note: {note_name}",
+            description=f"A simple note named {note_name}",
+            mimeType="text/plain",
+        )
+    _notes_prompt_lines[note_name] = f"- {note_name}: {content}"
+
+    # Notify clients that resources have changed
+    await server.request_context.session.send_resource_list_changed()
+
     return [
-        types.Tool(
-            name="add-note",
-            description="Add a new note",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "name": {"type": "string"},
-                    "content": {"type": "string"},
-                },
-                "required": ["name", "content"],
-            },
-        ),
-        types.Tool(
-            name="create-agenda-note",
-            description="Create a note in Agenda",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "title": {"type": "string"},
-                    "text": {"type": "string"},
-                    "project_title": {"type": "string"},
-                    "on_the_agenda": {"type": "boolean"},
-                    "date": {"type": "string"},
-                    "start_date": {"type": "string"},
-                    "end_date": {"type": "string"},
-                    "template_name": {"type": "string"},
-                    "template_input": {"type": "string"},
-                    "collapsed": {"type": "boolean"},
-                    "completed": {"type": "boolean"},
-                    "pinned": {"type": "boolean"},
-                    "footnote": {"type": "boolean"},
-                    "select": {"type": "boolean"},
-                },
-                "required": ["title", "text"],
-            },
-        ),
-        types.Tool(
-            name="create-agenda-project",
-            description="Create a new project in Agenda",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "title": {"type": "string"},
-                    "category_title": {"type": "string"},
-                    "identifier": {"type": "string"},
-                    "select": {"type": "boolean"},
-                    "sort_order": {
-                        "type": "string",
-                        "enum": ["newest-first", "oldest-first"]
-                    }
-                },
-                "required": ["title"]
-            },
-        ),
-        types.Tool(
-            name="open-agenda-note",
-            description="Open a note in Agenda",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "title": {"type": "string"},
-                    "identifier": {"type": "string"},
-                    "project_title": {"type": "string"},
-                    "separate_window": {"type": "boolean"}
-                },
-                # No required fields since either title or identifier can be used
-            },
+        types.TextContent(
+            type="text",
+            text=f"Added note '{note_name}' with content: {content}",
         )
     ]
 
+async def _do_create_note(
+    arguments: dict,
+) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+    """Create a note in Agenda via the create-note x-callback-url."""
+    if "title" not in arguments or "text" not in arguments:
+        raise ValueError("Missing title or text")
+
+    url = _url_for("create-note", arguments)
+
+    return await _dispatch_url(
+        url,
+        f"Created note '{arguments['title']}' in Agenda",
+        "Failed to create note in Agenda",
+    )
+
+async def _do_create_project(
+    arguments: dict,
+) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+    """Create a project in Agenda via the create-project x-callback-url."""
+    if "title" not in arguments:
+        raise ValueError("Missing title")
+
+    url = _url_for("create-project", arguments)
+
+    return await _dispatch_url(
+        url,
+        f"Created project '{arguments['title']}' in Agenda",
+        "Failed to create project in Agenda",
+    )
+
+async def _do_open_note(
+    arguments: dict,
+) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+    """Open an existing note in Agenda via the open-note x-callback-url."""
+    if not any(key in arguments for key in ["title", "identifier"]):
+        raise ValueError("Either title or identifier must be provided")
+
+    url = _url_for("open-note", arguments)
+
+    note_desc = arguments.get('title', arguments.get('identifier', 'requested note'))
+    return await _dispatch_url(
+        url,
+        f"Opened note '{note_desc}' in Agenda",
+        "Failed to open note in Agenda",
+        # Opening a note is idempotent, so duplicate requests can share a dispatch
+        coalesce=True,
+    )
+
+async def _do_batch(
+    arguments: dict,
+) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+    """Run a list of tool calls concurrently."""
+    if not arguments.get("calls"):
+        raise ValueError("Missing calls")
+    if not isinstance(arguments["calls"], list):
+        raise ValueError("calls must be a list")
+
+    calls = []
+    for call in arguments["calls"]:
+        if not isinstance(call, dict) or not isinstance(call.get("name"), str):
+            raise ValueError("Each call must be an object with a name")
+        if not isinstance(call.get("arguments"), dict | None):
+            raise ValueError("Call arguments must be an object")
+        if call.get("name") == "batch-agenda-ops":
+            raise ValueError("Nested batch-agenda-ops calls are not supported")
+        calls.append((call.get("name"), call.get("arguments")))
+
+    return await handle_call_tool_batch(calls)
+
+_TOOL_HANDLERS: dict[
+    str,
+    Callable[
+        [dict],
+        Awaitable[list[types.TextContent | types.ImageContent | types.EmbeddedResource]],
+    ],
+] = {
+    "add-note": _do_add_note,
+    "create-agenda-note": _do_create_note,
+    "create-agenda-project": _do_create_project,
+    "open-agenda-note": _do_open_note,
+    "batch-agenda-ops": _do_batch,
+}
+
 @server.call_tool()
 async def handle_call_tool(
     name: str, arguments: dict | None
@@ -203,182 +580,97 @@ async def handle_call_tool(
     Handle tool execution requests.
     Tools can modify server state and notify clients of changes.
     """
-    if name == "add-note":
-        if not arguments:
-            raise ValueError("Missing arguments")
+    handler = _TOOL_HANDLERS.get(name)
+    if handler is None:
+        raise ValueError(f"Unknown tool: {name}")
+    if not arguments:
+        raise ValueError("Missing arguments")
 
-        note_name = arguments.get("name")
-        content = arguments.get("content")
+    return await handler(arguments)
 
-        if not note_name or not content:
-            raise ValueError("Missing name or content")
+async def handle_call_tool_batch(
+    calls: list[tuple[str, dict | None]],
+) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+    """
+    Execute independent tool calls concurrently.
+    Each call's output is returned in order; failures are reported inline
+    instead of aborting the remaining calls. If the client sent a progress
+    token, a progress notification is emitted as each call completes.
+    """
+    async def run(index: int, name: str, arguments: dict | None):
+        try:
+            return index, await handle_call_tool(name, arguments)
+        except Exception as e:
+            return index, e
 
-        # Update server state
-        notes[note_name] = content
+    try:
+        ctx = server.request_context
+    except LookupError:
+        ctx = None
+    progress_token = ctx.meta.progressToken if ctx and ctx.meta else None
 
-        # Notify clients that resources have changed
-        await server.request_context.session.send_resource_list_changed()
+    tasks = [
+        asyncio.create_task(run(index, name, arguments))
+        for index, (name, arguments) in enumerate(calls)
+    ]
+    results: list = [None] * len(tasks)
+    try:
+        for completed, next_done in enumerate(asyncio.as_completed(tasks), start=1):
+            index, result = await next_done
+            results[index] = result
+            if progress_token is not None:
+                try:
+                    await ctx.session.send_progress_notification(
+                        progress_token, completed, len(tasks)
+                    )
+                except Exception:
+                    # Progress is best-effort; a failed notification (e.g. the
+                    # client went away) must not abort the batch
+                    pass
+    finally:
+        # If the batch itself is cancelled, don't leave sub-calls running
+        for task in tasks:
+            if not task.done():
+                task.cancel()
 
-        return [
-            types.TextContent(
-                type="text",
-                text=f"Added note '{note_name}' with content: {content}",
-            )
-        ]
-    
-    elif name == "create-agenda-note":
-        if not arguments:
-            raise ValueError("Missing arguments")
-
-        # Build the x-callback URL
-        base_url = "agenda://x-callback-url/create-note"
-        params = []
-        
-        # Required parameters
-        params.append(f"title={quote(arguments['title'])}")
-        params.append(f"text={quote(arguments['text'])}")
-        
-        # Optional parameters
-        if "project_title" in arguments:
-            params.append(f"project-title={quote(arguments['project_title'])}")
-        if "on_the_agenda" in arguments:
-            params.append(f"on-the-agenda={str(arguments['on_the_agenda']).lower()}")
-        if "date" in arguments:
-            params.append(f"date={quote(arguments['date'])}")
-        if "start_date" in arguments:
-            params.append(f"start-date={quote(arguments['start_date'])}")
-        if "end_date" in arguments:
-            params.append(f"end-date={quote(arguments['end_date'])}")
-        if "template_name" in arguments:
-            params.append(f"template-name={quote(arguments['template_name'])}")
-        if "template_input" in arguments:
-            params.append(f"template-input={quote(arguments['template_input'])}")
-        if "collapsed" in arguments:
-            params.append(f"collapsed={str(arguments['collapsed']).lower()}")
-        if "completed" in arguments:
-            params.append(f"completed={str(arguments['completed']).lower()}")
-        if "pinned" in arguments:
-            params.append(f"pinned={str(arguments['pinned']).lower()}")
-        if "footnote" in arguments:
-            params.append(f"footnote={str(arguments['footnote']).lower()}")
-        if "select" in arguments:
-            params.append(f"select={str(arguments['select']).lower()}")
-        
-        url = f"{base_url}?{'&'.join(params)}"
-        
-        # Execute the x-callback URL
-        try:
-            XCallbackURLHandler.call_url(url)
-            return [
-                types.TextContent(
-                    type="text",
-                    text=f"Created note '{arguments['title']}' in Agenda",
-                )
-            ]
-        except Exception as e:
-            return [
-                types.TextContent(
-                    type="text",
-                    text=f"Failed to create note in Agenda: {str(e)}",
-                )
-            ]
-    
-    elif name == "create-agenda-project":
-        if not arguments:
-            raise ValueError("Missing arguments")
-
-        # Build the x-callback URL
-        base_url = "agenda://x-callback-url/create-project"
-        params = []
-        
-        # Required parameters
-        params.append(f"title={quote(arguments['title'])}")
-        
-        # Optional parameters
-        if "category_title" in arguments:
-            params.append(f"category-title={quote(arguments['category_title'])}")
-        if "identifier" in arguments:
-            params.append(f"identifier={quote(arguments['identifier'])}")
-        if "select" in arguments:
-            params.append(f"select={str(arguments['select']).lower()}")
-        if "sort_order" in arguments:
-            params.append(f"sort-order={arguments['sort_order']}")
-        
-        url = f"{base_url}?{'&'.join(params)}"
-        
-        # Execute the x-callback URL
-        try:
-            XCallbackURLHandler.call_url(url)
-            return [
-                types.TextContent(
-                    type="text",
-                    text=f"Created project '{arguments['title']}' in Agenda",
-                )
-            ]
-        except Exception as e:
-            return [
-                types.TextContent(
-                    type="text",
-                    text=f"Failed to create project in Agenda: {str(e)}",
-                )
-            ]
-    
-    elif name == "open-agenda-note":
-        if not arguments:
-            raise ValueError("Missing arguments")
-        
-        if not any(key in arguments for key in ["title", "identifier"]):
-            raise ValueError("Either title or identifier must be provided")
-
-        # Build the x-callback URL
-        base_url = "agenda://x-callback-url/open-note"
-        params = []
-        
-        # Optional parameters
-        if "title" in arguments:
-            params.append(f"title={quote(arguments['title'])}")
-        if "identifier" in arguments:
-            params.append(f"identifier={quote(arguments['identifier'])}")
-        if "project_title" in arguments:
-            params.append(f"project-title={quote(arguments['project_title'])}")
-        if "separate_window" in arguments:
-            params.append(f"separate-window={str(arguments['separate_window']).lower()}")
-        
-        url = f"{base_url}?{'&'.join(params)}"
-        
-        # Execute the x-callback URL
-        try:
-            XCallbackURLHandler.call_url(url)
-            note_desc = arguments.get('title', arguments.get('identifier', 'requested note'))
-            return [
+    contents: list[types.TextContent | types.ImageContent | types.EmbeddedResource] = []
+    for (name, _), result in zip(calls, results):
+        if isinstance(result, Exception):
+            contents.append(
                 types.TextContent(
                     type="text",
-                    text=f"Opened note '{note_desc}' in Agenda",
+                    text=f"Tool '{name}' failed: {str(result)}",
                 )
-            ]
-        except Exception as e:
-            return [
-                types.TextContent(
-                    type="text",
-                    text=f"Failed to open note in Agenda: {str(e)}",
-                )
-            ]
-    
-    else:
-        raise ValueError(f"Unknown tool: {name}")
+            )
+        else:
+            contents.extend(result)
+    return contents
+
+@functools.cache
+def _init_options():
+    """
+    Build the server's InitializationOptions once, on first use.
+    Capabilities are derived from the registered handlers, so this must
+    not run before the module has finished registering them.
+    """
+    from mcp.server.models import InitializationOptions
+
+    return InitializationOptions(
+        server_name="mcp-server-agenda",
+        server_version="0.2.0",
+        capabilities=server.get_capabilities(
+            notification_options=NotificationOptions(),
+            experimental_capabilities={},
+        ),
+    )
 
 async def main():
+    import mcp.server.stdio
+
     # Run the server using stdin/stdout streams
     async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
         await server.run(
             read_stream,
             write_stream,
-            InitializationOptions(
-                server_name="mcp-server-agenda",
-                server_version="0.2.0",
-                capabilities=server.get_capabilities(
-                    notification_options=NotificationOptions(),
-                    experimental_capabilities={},
-                ),
-            ),
+            _init_options(),
         )
\ No newline at end of file